@@ -1,14 +1,452 @@
 # %%
 import os
+import html
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from urllib.parse import quote
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
-import base64
+
+try:
+    # SIMD-accelerated drop-in replacement for the standard base64 module
+    import pybase64 as base64
+except ImportError:
+    import base64
 from io import BytesIO
 
+# HTML skeletons of the tab and the tab content of each column, filled with format_map
+_COLUMN_TAB_TEMPLATE = """
+                <a class="list-group-item list-group-item-action {active}" id="{id}-tab" data-bs-toggle="list" href="#{id}" role="tab" aria-controls="{id}">{label}</a>
+        """
+_COLUMN_PANE_TEMPLATE = """
+        <div class="tab-pane fade {show} {active}" id="{id}" role="tabpanel" aria-labelledby="{id}-tab">
+            <h2>Analysis for column: {label}</h2>
+        """
+
+# Names of the chart files written to the assets directory of a report
+_CHART_FILE_PATTERN = re.compile(r"(column_\d+|correlation)\.(png|jpeg)")
+
+# Figure and image buffer of a rendering worker process, set by its initializer
+_worker_canvas = None
+
 
 # %%
-def generate_html_analysis(df, output_html="output.html", max_categories=10):
+def _plot_settings(font_family="DejaVu Sans"):
+    """
+    Builds the matplotlib settings used by every chart, both in the main process and in the rendering workers.
+
+    Args:
+        font_family (str): The font used in the charts. Default is 'DejaVu Sans', which supports Unicode characters.
+
+    Returns:
+        dict: The rcParams of the charts.
+    """
+
+    # General settings for the plots, the parts of seaborn's "whitegrid" style and
+    # "notebook" context used by the charts
+    return {
+        "font.family": font_family,
+        "font.size": 12,
+        "text.color": ".15",
+        "axes.facecolor": "white",
+        "axes.edgecolor": ".8",
+        "axes.linewidth": 1.25,
+        "axes.grid": True,
+        "axes.axisbelow": True,
+        "axes.labelcolor": ".15",
+        "axes.labelsize": 12,
+        "axes.titlesize": 12,
+        "grid.color": ".8",
+        "grid.linewidth": 1,
+        "lines.solid_capstyle": "round",
+        "patch.edgecolor": "w",
+        "patch.force_edgecolor": True,
+        "xtick.color": ".15",
+        "xtick.labelsize": 11,
+        "xtick.bottom": False,
+        "xtick.major.size": 6,
+        "xtick.major.width": 1.25,
+        "ytick.color": ".15",
+        "ytick.labelsize": 11,
+        "ytick.left": False,
+        "ytick.major.size": 6,
+        "ytick.major.width": 1.25,
+    }
+
+
+def _new_canvas():
+    """
+    Creates a figure and an image buffer to be reused by a sequence of charts.
+
+    Returns:
+        tuple: The figure, drawn straight on an Agg canvas without being tracked by pyplot, and the buffer.
+    """
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+
+    return fig, BytesIO()
+
+
+def _init_worker(font_family="DejaVu Sans"):
+    """
+    Prepares a rendering worker process, with the chart settings and its own figure and image buffer.
+
+    Args:
+        font_family (str): The font used in the charts. Default is 'DejaVu Sans', which supports Unicode characters.
+    """
+
+    global _worker_canvas
+
+    # The worker process only renders charts, so the settings can be applied globally
+    matplotlib.rcParams.update(_plot_settings(font_family))
+    _worker_canvas = _new_canvas()
+
+
+def _reset_axes(fig, figsize):
+    """
+    Clears a reused figure and returns a new axes on it.
+
+    Args:
+        fig (matplotlib.figure.Figure): The figure to be cleared.
+        figsize (tuple): The size of the figure in inches.
+
+    Returns:
+        matplotlib.axes.Axes: The new axes.
+    """
+
+    fig.clear()
+    fig.set_size_inches(figsize)
+
+    return fig.add_subplot(111)
+
+
+def _column_ids(columns):
+    """
+    Builds a unique ASCII slug for each column, to be used as its HTML id.
+
+    Args:
+        columns (pd.Index): The columns of the DataFrame.
+
+    Returns:
+        list: The interned id of each column, in the same order.
+    """
+
+    # A column id is also used with a "-tab" suffix, so leave out the ids of the
+    # correlation tab and of the "list-tab" container
+    used_ids = {"correlation", "list"}
+    column_ids = []
+    for i, column in enumerate(columns):
+        column_id = re.sub(r"\W+", "_", str(column), flags=re.ASCII)
+
+        # Ids must not be empty or start with a digit to be usable as CSS selectors
+        if not column_id or column_id[0].isdigit():
+            column_id = f"column_{column_id}"
+        # The suffixed id may itself be taken by another column, so keep counting
+        candidate, suffix = column_id, i
+        while candidate in used_ids:
+            candidate = f"{column_id}_{suffix}"
+            suffix += 1
+        column_id = candidate
+
+        used_ids.add(column_id)
+        column_ids.append(sys.intern(column_id))
+
+    return column_ids
+
+
+def _encode_figure(fig, buffer, image_format="png", embed=True):
+    """
+    Saves a figure as an image, base64-encoded to be embedded in the HTML.
+
+    Args:
+        fig (matplotlib.figure.Figure): The figure to be saved.
+        buffer (BytesIO): The buffer reused to hold the image.
+        image_format (str): The image format, either 'png' or 'jpeg'. Default is 'png'.
+        embed (bool): Whether to base64-encode the image. Default is True.
+
+    Returns:
+        str or bytes: The base64-encoded image, or the raw image bytes when embed is False.
+    """
+
+    # A low DPI and fast compression keep the encoding cheap, the charts are displayed small anyway
+    pil_kwargs = {"optimize": False}
+    if image_format == "png":
+        pil_kwargs["compress_level"] = 1
+
+    buffer.seek(0)
+    buffer.truncate(0)
+    fig.savefig(
+        buffer,
+        format=image_format,
+        bbox_inches="tight",
+        dpi=72,
+        facecolor="w",
+        pil_kwargs=pil_kwargs,
+    )
+
+    if not embed:
+        return buffer.getvalue()
+
+    # Encode the image as a base64 string
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _plot_kde(ax, values, kde_sample, bins=20):
+    """
+    Draws a Gaussian KDE of the values, scaled to overlay a histogram of counts. Large columns are estimated on a random sample.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes with the histogram.
+        values (np.ndarray): The non-missing values of the column.
+        kde_sample (int): The maximum number of values used to estimate the density.
+        bins (int): The number of bins of the histogram. Default is 20.
+    """
+
+    sample = values
+    if len(values) > kde_sample:
+        sample = np.random.default_rng(0).choice(values, kde_sample, replace=False)
+    if len(sample) < 2:
+        return
+
+    # Scott's rule, the same bandwidth used by seaborn
+    bandwidth = sample.std(ddof=1) * len(sample) ** (-1 / 5)
+    if not bandwidth > 0:
+        return
+
+    grid = np.linspace(values.min(), values.max(), 200)
+    density = np.exp(-0.5 * ((grid[:, None] - sample[None, :]) / bandwidth) ** 2).sum(
+        axis=1
+    ) / (len(sample) * bandwidth * np.sqrt(2 * np.pi))
+
+    # Scale the density to the histogram counts
+    bin_width = (values.max() - values.min()) / bins
+    ax.plot(grid, density * len(values) * bin_width, color="blue")
+
+
+def _render_column(
+    fig,
+    buffer,
+    column,
+    series,
+    stats,
+    num_missing,
+    is_numeric,
+    max_categories,
+    image_format,
+    kde_sample,
+    embed_images,
+):
+    """
+    Generates the statistics and the chart of a single column.
+
+    Args:
+        fig (matplotlib.figure.Figure): The figure reused to draw the chart.
+        buffer (BytesIO): The buffer reused to hold the chart image.
+        column (str): The name of the column.
+        series (pd.Series): The values of the column.
+        stats (pd.Series): The descriptive statistics of a numeric column, or None to compute them from the values.
+        num_missing (int): The number of missing values in the column.
+        is_numeric (bool): Whether the column has a numeric dtype.
+        max_categories (int): The maximum number of categories to display in bar charts.
+        image_format (str): The image format of the chart, either 'png' or 'jpeg'.
+        kde_sample (int): The maximum number of values used to estimate the density curve of histograms.
+        embed_images (bool): Whether to base64-encode the chart.
+
+    Returns:
+        tuple: The HTML with its statistics and the chart, base64-encoded or as raw bytes.
+    """
+
+    # Add the statistics to the HTML, checking if the column is numeric or categorical
+    if is_numeric:
+        if stats is None:
+            stats = series.describe(include="all")
+
+        stats_html = f"""
+        <p><strong>Count:</strong> {stats.get('count', 'N/A')}</p>
+        <strong>Mean:</strong> {stats.get('mean', 'N/A')} <br>
+        <strong>Standard Deviation:</strong> {stats.get('std', 'N/A')}<br>
+        <strong>Min:</strong> {stats.get('min', 'N/A')}<br>
+        <strong>25%:</strong> {stats.get('25%', 'N/A')}<br>
+        <strong>Median:</strong> {stats.get('50%', 'N/A')}<br>
+        <strong>75%:</strong> {stats.get('75%', 'N/A')}<br>
+        <strong>Max:</strong> {stats.get('max', 'N/A')}<br>
+        <strong>Missing Values (NaN/Null):</strong> {num_missing}</p>
+        """
+
+        # Generate the histogram for numeric columns with NumPy's histogram, the
+        # density curve is estimated on a sample for large columns
+        # Infinite values cannot be binned, so only the finite ones are plotted
+        values = series.dropna().to_numpy(dtype=np.float64)
+        values = values[np.isfinite(values)]
+        ax = _reset_axes(fig, (10, 6))
+        ax.hist(values, bins=20, color="blue", alpha=0.5)
+        _plot_kde(ax, values, kde_sample)
+        ax.set_title(f"Histogram of {column}")
+        ax.set_xlabel(column)
+        ax.set_ylabel("Frequency")
+    else:
+        # For categorical columns, show relevant statistics, all taken from the
+        # value counts that are also used for the bar chart
+        value_counts = series.value_counts(sort=False)
+        # Categoricals also count their unobserved categories, with zero occurrences
+        value_counts = value_counts[value_counts > 0]
+        has_values = len(value_counts) > 0
+        stats = {
+            "count": len(series) - num_missing,
+            "unique": len(value_counts),
+            "top": value_counts.idxmax() if has_values else np.nan,
+            "freq": value_counts.max() if has_values else np.nan,
+        }
+        stats_html = f"""
+        <p><strong>Count:</strong> {stats.get('count', 'N/A')}</p>
+        <p><strong>Unique:</strong> {stats.get('unique', 'N/A')}</p>
+        <p><strong>Top:</strong> {stats.get('top', 'N/A')}</p>
+        <p><strong>Frequency of Top:</strong> {stats.get('freq', 'N/A')}</p>
+        <p><strong>Missing Values (NaN/Null):</strong> {num_missing}</p>
+        """
+
+        # Count only the top 'max_categories' categories and plot the counts directly
+        value_counts = value_counts.nlargest(max_categories)
+
+        # Generate the bar chart for categorical columns
+        ax = _reset_axes(fig, (10, 6))
+        ax.bar(
+            value_counts.index.astype(str),
+            value_counts.to_numpy(),
+            color=matplotlib.colormaps["viridis"](np.linspace(0, 1, len(value_counts))),
+        )
+        ax.set_title(f"Bar Chart of {column} (Top {max_categories} categories)")
+        ax.set_xlabel(column)
+        ax.set_ylabel("Frequency")
+        ax.tick_params(axis="x", labelrotation=90)
+
+    # Save the plot as an image
+    image = _encode_figure(fig, buffer, image_format, embed_images)
+
+    return stats_html, image
+
+
+def _render_column_in_worker(*args, **kwargs):
+    """
+    Generates the statistics and the chart of a single column with the figure and image buffer of the worker process.
+
+    Args:
+        *args: The arguments of _render_column after the figure and the buffer.
+        **kwargs: The keyword arguments of _render_column.
+
+    Returns:
+        tuple: The HTML with its statistics and the chart, base64-encoded or as raw bytes.
+    """
+
+    return _render_column(*_worker_canvas, *args, **kwargs)
+
+
+@contextmanager
+def _open_replacing(path, buffering=-1):
+    """
+    Opens a temporary file next to the given path for binary writing and moves it over the path once closed.
+
+    Args:
+        path (str): The path of the file to be written.
+        buffering (int): The buffer size of the temporary file. Default is -1, the system default.
+
+    Yields:
+        file: The temporary file, which is removed instead if an error occurs while writing it.
+    """
+
+    # A unique temporary file, so concurrent writers of the same path do not share it
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.",
+        suffix=".tmp",
+        dir=os.path.dirname(path) or ".",
+    )
+    try:
+        with open(fd, "wb", buffering=buffering) as file:
+            yield file
+
+        # The temporary file is private, give it the mode of the file it replaces
+        os.chmod(temp_path, os.stat(path).st_mode if os.path.exists(path) else 0o644)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _replace_charts(charts_directory, assets_directory):
+    """
+    Moves newly rendered charts into the assets directory, removing the charts left over from an earlier report. Other files in the directory are kept.
+
+    Args:
+        charts_directory (str): The directory with the new charts.
+        assets_directory (str): The directory referenced by the report.
+    """
+
+    os.makedirs(assets_directory, exist_ok=True)
+
+    chart_files = set(os.listdir(charts_directory))
+    for file_name in os.listdir(assets_directory):
+        if _CHART_FILE_PATTERN.fullmatch(file_name) and file_name not in chart_files:
+            os.remove(os.path.join(assets_directory, file_name))
+
+    for file_name in chart_files:
+        os.replace(
+            os.path.join(charts_directory, file_name),
+            os.path.join(assets_directory, file_name),
+        )
+
+
+@contextmanager
+def _open_report(path, assets_directory=None, buffering=-1):
+    """
+    Opens a temporary HTML file and, when the charts are saved apart, a temporary directory for them, and moves both into place once the report is complete.
+
+    Args:
+        path (str): The path of the HTML file to be written.
+        assets_directory (str): The directory the charts are moved to, or None when they are embedded. Default is None.
+        buffering (int): The buffer size of the temporary file. Default is -1, the system default.
+
+    Yields:
+        tuple: The temporary file and the temporary charts directory, or None when the charts are embedded. Both are removed instead if an error occurs.
+    """
+
+    charts_directory = None
+    if assets_directory is not None:
+        charts_directory = tempfile.mkdtemp(
+            prefix=f".{os.path.basename(assets_directory)}.",
+            dir=os.path.dirname(assets_directory) or ".",
+        )
+    try:
+        with _open_replacing(path, buffering) as file:
+            yield file, charts_directory
+        if charts_directory is not None:
+            _replace_charts(charts_directory, assets_directory)
+    finally:
+        if charts_directory is not None:
+            shutil.rmtree(charts_directory, ignore_errors=True)
+
+
+# %%
+def generate_html_analysis(
+    df,
+    output_html="output.html",
+    max_categories=10,
+    compute_duplicates=True,
+    max_workers=1,
+    image_format="png",
+    kde_sample=10000,
+    embed_images=True,
+    font_family="DejaVu Sans",
+):
     """
     Generates an HTML file with statistical analysis, charts for each column, and correlation analysis for numerical variables.
 
@@ -16,21 +454,86 @@ def generate_html_analysis(df, output_html="output.html", max_categories=10):
         df (pd.DataFrame): The DataFrame to be analyzed.
         output_html (str): The name of the HTML file to be generated. Default is 'output.html'.
         max_categories (int): The maximum number of categories to display in bar charts. Default is 10.
+        compute_duplicates (bool): Whether to count the duplicated lines, which hashes every row. Default is True.
+        max_workers (int): The number of processes used to render the column charts. Default is 1, which renders them in the current process; None uses every CPU.
+        image_format (str): The format of the embedded charts, either 'png' or 'jpeg'. Default is 'png'.
+        kde_sample (int): The maximum number of values used to estimate the density curve of histograms. Default is 10000.
+        embed_images (bool): Whether to embed the charts in the HTML as base64. When False, they are written to a '<name>_assets' directory next to the HTML file, named after it. Default is True.
+        font_family (str): The font used in the charts. Default is 'DejaVu Sans', which supports Unicode characters.
+
+    Raises:
+        ValueError: If the image format is not 'png' or 'jpeg'.
     """
 
-    # Configure matplotlib to use a font that supports Unicode characters
+    # The charts are saved with Pillow options and a MIME type that only fit these
+    if image_format not in ("png", "jpeg"):
+        raise ValueError(f"image_format must be 'png' or 'jpeg', got {image_format!r}")
+
+    # General information about the dataset
+    shape_info = df.shape
+    num_duplicated_lines = (
+        int(df.duplicated().to_numpy().sum()) if compute_duplicates else "N/A"
+    )
+
+    # Count the missing values of every column in a single NumPy reduction over the mask
+    na_counts = df.isna().to_numpy().sum(axis=0)
+    num_missing_values = int(na_counts.sum())
 
-    plt.rcParams["font.family"] = "DejaVu Sans"
+    # Use a sanitized id and an escaped label for each column in the HTML
+    columns = df.columns
+    column_ids = _column_ids(columns)
+    column_labels = [html.escape(str(column)) for column in columns]
 
-    # General settings for the plots
-    sns.set_theme(style="whitegrid", palette="deep", context="notebook")
+    numeric_mask = {
+        column: pd.api.types.is_numeric_dtype(dtype)
+        for column, dtype in df.dtypes.items()
+    }
 
-    # Start the HTML content with general information at the top
-    shape_info = df.shape
-    num_duplicated_lines = df.duplicated().sum()
-    num_missing_values = df.isna().sum().sum()
+    # Get the statistics for every numeric column at once, the other columns are
+    # summarized from the value counts computed for their charts
+    has_numbers = any(
+        numeric_mask[column] and dtype.kind != "b"
+        for column, dtype in df.dtypes.items()
+    )
+    desc = df.describe(include="number") if has_numbers else pd.DataFrame()
+
+    # Ensure the output directory exists
+    directory = os.path.dirname(output_html)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # The charts of each report go in a directory named after it
+    assets_name = os.path.splitext(os.path.basename(output_html))[0] + "_assets"
+    assets_directory = os.path.join(directory, assets_name)
+
+    # Stream the HTML file part by part, encoding each part once and writing it
+    # through a large buffer, so the report is never held in memory as a whole; it
+    # and its charts only replace the output once complete, so an error leaves no
+    # partial report. The chart settings only apply while the report is generated,
+    # leaving those of the caller untouched
+    with matplotlib.rc_context(_plot_settings(font_family)), _open_report(
+        output_html, None if embed_images else assets_directory, buffering=1 << 20
+    ) as (html_file, charts_directory):
+
+        def write(part):
+            html_file.write(part.encode("utf-8"))
 
-    html_content = f"""
+        def image_tag(image, name):
+            # Embed the image as base64 or reference it from the assets directory,
+            # writing it to the temporary charts directory for now
+            if embed_images:
+                source = f"data:image/{image_format};base64,{image}"
+            else:
+                file_name = f"{name}.{image_format}"
+                image_path = os.path.join(charts_directory, file_name)
+                with open(image_path, "wb") as image_file:
+                    image_file.write(image)
+                source = quote(f"{assets_name}/{file_name}")
+            return f'<img src="{source}" class="img-fluid" />'
+
+        # Start the HTML content with general information at the top
+        write(
+            f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -58,138 +561,182 @@ def generate_html_analysis(df, output_html="output.html", max_categories=10):
             <div class="col-4">
                 <div class="list-group" id="list-tab" role="tablist">
     """
+        )
+
+        # Add a tab for each column, only the column names are needed
+        for i, (column_id, column_label) in enumerate(zip(column_ids, column_labels)):
+            write(
+                _COLUMN_TAB_TEMPLATE.format_map(
+                    {
+                        "active": "active" if i == 0 else "",
+                        "id": column_id,
+                        "label": column_label,
+                    }
+                )
+            )
 
-    tab_content = """
+        # Add a tab for correlation analysis
+        write(
+            """
+                <a class="list-group-item list-group-item-action" id="correlation-tab" data-bs-toggle="list" href="#correlation" role="tab" aria-controls="correlation">Correlation Analysis</a>
+    """
+        )
+        write(
+            """
+            </div> 
+            </div> 
+    """
+        )
+
+        write(
+            """
             <div class="col-8">
                 <div class="tab-content" id="nav-tabContent">
     """
+        )
 
-    # Generate statistics and charts for each column
-    for i, column in enumerate(df.columns):
-        active_class = "active" if i == 0 else ""
-        show_class = "show" if i == 0 else ""
+        # Render the statistics and charts of the columns, one column per task, in
+        # parallel when more than one worker is requested; each worker draws on its
+        # own figure, and the current process on one created for this report
+        fig, buffer = _new_canvas()
+        if max_workers == 1:
+            pool = nullcontext()
+            render_column = partial(_render_column, fig, buffer)
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(font_family,),
+            )
+            render_column = _render_column_in_worker
+        render_column = partial(
+            render_column,
+            max_categories=max_categories,
+            image_format=image_format,
+            kde_sample=kde_sample,
+            embed_images=embed_images,
+        )
+        render_args = (
+            columns,
+            (series for _, series in df.items()),
+            (desc[column] if column in desc.columns else None for column in columns),
+            (int(num_missing) for num_missing in na_counts),
+            (numeric_mask[column] for column in columns),
+        )
+        with pool as executor:
+            rendered_columns = (executor.map if executor else map)(
+                render_column, *render_args
+            )
 
-        # Add a tab for each column
-        html_content += f"""
-                <a class="list-group-item list-group-item-action {active_class}" id="{column}-tab" data-bs-toggle="list" href="#{column}" role="tab" aria-controls="{column}">{column}</a>
-        """
+            # Write the statistics and charts of each column as soon as they are rendered
+            for i, (column_id, column_label, (stats_html, image)) in enumerate(
+                zip(column_ids, column_labels, rendered_columns)
+            ):
+                # Add the content for the statistics and charts in the tab
+                write(
+                    _COLUMN_PANE_TEMPLATE.format_map(
+                        {
+                            "active": "active" if i == 0 else "",
+                            "show": "show" if i == 0 else "",
+                            "id": column_id,
+                            "label": column_label,
+                        }
+                    )
+                )
 
-        # Add the content for the statistics and charts in the tab
-        tab_content += f"""
-        <div class="tab-pane fade {show_class} {active_class}" id="{column}" role="tabpanel" aria-labelledby="{column}-tab">
-            <h2>Analysis for column: {column}</h2>
-        """
+                # Add the statistics and the image to the tab content
+                write(stats_html)
+                write(image_tag(image, f"column_{i}"))
+                write("</div>")
 
-        # Get the statistics for the column
-        stats = df[column].describe(include="all")
-        num_missing = df[column].isna().sum()
-
-        # Add the statistics to the HTML, checking if the column is numeric or categorical
-        if pd.api.types.is_numeric_dtype(df[column]):
-            tab_content += f"""
-            <p><strong>Count:</strong> {stats.get('count', 'N/A')}</p>
-            <strong>Mean:</strong> {stats.get('mean', 'N/A')} <br>
-            <strong>Standard Deviation:</strong> {stats.get('std', 'N/A')}<br>
-            <strong>Min:</strong> {stats.get('min', 'N/A')}<br>
-            <strong>25%:</strong> {stats.get('25%', 'N/A')}<br>
-            <strong>Median:</strong> {stats.get('50%', 'N/A')}<br>
-            <strong>75%:</strong> {stats.get('75%', 'N/A')}<br>
-            <strong>Max:</strong> {stats.get('max', 'N/A')}<br>
-            <strong>Missing Values (NaN/Null):</strong> {num_missing}</p>
+        write(
             """
+        <div class="tab-pane fade" id="correlation" role="tabpanel" aria-labelledby="correlation-tab">
+            <h2>Correlation Analysis</h2>
+    """
+        )
 
-            # Generate the histogram for numeric columns
-            plt.figure(figsize=(10, 6))
-            sns.histplot(df[column].dropna(), bins=20, color="blue", kde=True)
-            plt.title(f"Histogram of {column}")
-            plt.xlabel(column)
-            plt.ylabel("Frequency")
-        else:
-            # For categorical columns, show relevant statistics
-            tab_content += f"""
-            <p><strong>Count:</strong> {stats.get('count', 'N/A')}</p>
-            <p><strong>Unique:</strong> {stats.get('unique', 'N/A')}</p>
-            <p><strong>Top:</strong> {stats.get('top', 'N/A')}</p>
-            <p><strong>Frequency of Top:</strong> {stats.get('freq', 'N/A')}</p>
-            <p><strong>Missing Values (NaN/Null):</strong> {num_missing}</p>
-            """
+        # Generate the correlation heatmap for numeric columns
+        numeric_columns = [
+            column
+            for column, dtype in df.dtypes.items()
+            if numeric_mask[column] and dtype.kind in "fiu"
+        ]
+        if len(numeric_columns) > 1:
+            # Correlate the columns on a contiguous array, in float32 for wide frames
+            # since the matrix is only displayed
+            dtype = np.float32 if len(numeric_columns) >= 32 else np.float64
+            values = np.ascontiguousarray(
+                df[numeric_columns].to_numpy(dtype=dtype, copy=False, na_value=np.nan)
+            )
+            observed = ~np.isnan(values)
 
-            # Filter the data for categorical columns to show only the top 'max_categories' categories
-            value_counts = df[column].value_counts().head(max_categories)
-            filtered_data = df[df[column].isin(value_counts.index)]
-
-            # Generate the bar chart for categorical columns
-            plt.figure(figsize=(10, 6))
-            sns.countplot(
-                x=column,
-                data=filtered_data,
-                order=value_counts.index,
-                hue=column,
-                dodge=False,
-                palette="viridis",
-                legend=False,
+            # Leave out the columns with fewer than two distinct values before looking at
+            # the rows, their correlation is undefined; comparing the extremes is exact
+            # where a float standard deviation may not be zero
+            varying = observed.sum(axis=0) > 1
+            if varying.any():
+                varying[varying] = np.nanmax(values[:, varying], axis=0) > np.nanmin(
+                    values[:, varying], axis=0
+                )
+            numeric_columns = [
+                column for column, keep in zip(numeric_columns, varying) if keep
+            ]
+            values = values[:, varying]
+            observed = observed[:, varying]
+
+        if len(numeric_columns) < 2:
+            write("<p>Not enough numeric columns for correlation analysis.</p>")
+        else:
+            if observed.all():
+                correlation = np.corrcoef(values, rowvar=False).astype(np.float64)
+            else:
+                # Dropping every row with a missing value can leave almost nothing
+                # to correlate, so each pair uses the rows where both are present
+                correlation = pd.DataFrame(values).corr().to_numpy(dtype=np.float64)
+            correlation_matrix = pd.DataFrame(
+                correlation, index=numeric_columns, columns=numeric_columns
             )
-            plt.title(f"Bar Chart of {column} (Top {max_categories} categories)")
-            plt.xlabel(column)
-            plt.ylabel("Frequency")
-            plt.xticks(rotation=90)
-
-        # Save the plot as a base64-encoded image
-        buffer = BytesIO()
-        plt.savefig(buffer, format="png", bbox_inches="tight", facecolor="w")
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode("utf-8")
-        buffer.close()
-        plt.close()
-
-        # Add the image to the tab content
-        tab_content += (
-            f'<img src="data:image/png;base64,{image_base64}" class="img-fluid" />'
-        )
-        tab_content += "</div>"
 
-    # Add a tab for correlation analysis
-    html_content += """
-                <a class="list-group-item list-group-item-action" id="correlation-tab" data-bs-toggle="list" href="#correlation" role="tab" aria-controls="correlation">Correlation Analysis</a>
-    """
-    tab_content += """
-        <div class="tab-pane fade" id="correlation" role="tabpanel" aria-labelledby="correlation-tab">
-            <h2>Correlation Analysis</h2>
-    """
+            # Annotating every cell draws one text per cell, so large matrices are
+            # drawn as a single image instead
+            ax = _reset_axes(fig, (12, 8))
+            if len(numeric_columns) <= 20:
+                sns.heatmap(
+                    correlation_matrix,
+                    annot=True,
+                    cmap="coolwarm",
+                    linewidths=0.5,
+                    ax=ax,
+                )
+            else:
+                heatmap = ax.imshow(
+                    correlation_matrix.to_numpy(), cmap="coolwarm", vmin=-1, vmax=1
+                )
+                ax.set_xticks(
+                    range(len(numeric_columns)), numeric_columns, rotation=90
+                )
+                ax.set_yticks(range(len(numeric_columns)), numeric_columns)
+                ax.grid(False)
+                fig.colorbar(heatmap, ax=ax)
+            ax.set_title("Correlation Heatmap")
 
-    # Generate the correlation heatmap for numeric columns
-    numeric_columns = df.select_dtypes(include=["float64", "int64"]).columns
-    if len(numeric_columns) > 1:
-        plt.figure(figsize=(12, 8))
-        correlation_matrix = df[numeric_columns].corr()
-        sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm", linewidths=0.5)
-        plt.title("Correlation Heatmap")
-
-        # Save the heatmap as a base64-encoded image
-        buffer = BytesIO()
-        plt.savefig(buffer, format="png", bbox_inches="tight", facecolor="w")
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode("utf-8")
-        buffer.close()
-        plt.close()
-
-        # Add the heatmap to the tab content
-        tab_content += (
-            f'<img src="data:image/png;base64,{image_base64}" class="img-fluid" />'
-        )
+            # Save the heatmap as an image
+            image = _encode_figure(fig, buffer, image_format, embed_images)
 
-    tab_content += "</div>"  # Close the correlation tab content
-    tab_content += "</div>"  # Close the tab content wrapper
+            # The correlation inputs can be as large as the numeric data, release them
+            # before writing the rest of the report
+            del values, observed, correlation, correlation_matrix
 
-    # Finish the HTML with the footer
-    html_content += (
-        """
-            </div> 
-            </div> 
-    """
-        + tab_content
-    )
-    html_content += """
+            # Add the heatmap to the tab content
+            write(image_tag(image, "correlation"))
+
+        write("</div>")  # Close the correlation tab content
+        write("</div>")  # Close the tab content wrapper
+
+        # Finish the HTML with the footer
+        write(
+            """
         </div> 
         </div> 
         <footer class="mt-5">
@@ -200,14 +747,6 @@ def generate_html_analysis(df, output_html="output.html", max_categories=10):
     </body>
     </html>
     """
-
-    # Ensure the output directory exists
-    directory = os.path.dirname(output_html)
-    if directory:
-        os.makedirs(directory, exist_ok=True)
-
-    # Save the HTML file
-    with open(output_html, "w", encoding="utf-8") as html_file:
-        html_file.write(html_content)
+        )
 
     print(f"HTML file '{output_html}' created successfully!")